@@ -1,10 +1,15 @@
 import concurrent.futures
+import contextlib
 import functools
+import io
 import json
 import os
 import posixpath
+import random
 import shlex
+import stat
 import sys
+import time
 import logging
 from concurrent.futures import FIRST_EXCEPTION
 
@@ -12,8 +17,8 @@ from concurrent.futures import FIRST_EXCEPTION
 import paramiko
 
 # Flintrock modules
-from .ssh import get_ssh_client, ssh_check_output, ssh, SSHKeyPair
-from .exceptions import SSHError
+from .ssh import get_ssh_client, get_sftp_client, ssh_check_output, ssh, SSHKeyPair
+from .exceptions import SSHError, Error
 
 FROZEN = getattr(sys, 'frozen', False)
 
@@ -24,6 +29,11 @@ else:
 
 SCRIPTS_DIR = os.path.join(THIS_DIR, 'scripts')
 
+# copy-file uploads files larger than this over several SFTP channels at once.
+# We stay well under OpenSSH's default limit of 10 sessions per connection.
+PARALLEL_UPLOAD_THRESHOLD_BYTES = 8 * 1024 ** 2
+PARALLEL_UPLOAD_CHANNELS = 4
+
 
 logger = logging.getLogger('flintrock.core')
 
@@ -134,24 +144,36 @@ class FlintrockCluster:
         """
         raise NotImplementedError
 
-    def load_manifest(self, *, user: str, identity_file: str):
+    def load_manifest(
+            self,
+            *,
+            user: str,
+            identity_file: str,
+            master_ssh_client: paramiko.client.SSHClient=None):
         """
         Load a cluster's manifest from the master. This will populate information
         about installed services and configured storage.
 
+        If master_ssh_client is provided, we use it and leave it open for the
+        caller. Otherwise, we open and close our own connection to the master.
+
         Providers shouldn't need to override this method.
         """
         if not self.master_ip:
             return
 
-        master_ssh_client = get_ssh_client(
-            user=user,
-            host=self.master_ip,
-            identity_file=identity_file,
-            wait=True,
-            print_status=False)
-
-        with master_ssh_client:
+        if master_ssh_client:
+            client_context = contextlib.nullcontext()
+        else:
+            master_ssh_client = get_ssh_client(
+                user=user,
+                host=self.master_ip,
+                identity_file=identity_file,
+                wait=True,
+                print_status=False)
+            client_context = master_ssh_client
+
+        with client_context:
             manifest_raw = ssh_check_output(
                 client=master_ssh_client,
                 command="""
@@ -236,31 +258,41 @@ class FlintrockCluster:
         started up by the provider (e.g. EC2, GCE, etc.) they're hosted on
         and are running.
         """
-        self.load_manifest(user=user, identity_file=identity_file)
-
-        partial_func = functools.partial(
-            start_node,
-            services=self.services,
-            user=user,
-            identity_file=identity_file,
-            cluster=self)
-        hosts = [self.master_ip] + self.slave_ips
-
-        run_against_hosts(partial_func=partial_func, hosts=hosts)
-
+        # We open the master connection once and use it both to load the
+        # manifest and to configure the master once all the nodes are started.
         master_ssh_client = get_ssh_client(
             user=user,
             host=self.master_ip,
-            identity_file=identity_file)
+            identity_file=identity_file,
+            wait=True,
+            print_status=False)
 
         with master_ssh_client:
+            # Keep the connection alive while it sits idle waiting on the slaves.
+            master_ssh_client.get_transport().set_keepalive(30)
+
+            self.load_manifest(
+                user=user,
+                identity_file=identity_file,
+                master_ssh_client=master_ssh_client)
+
+            partial_func = functools.partial(
+                start_node,
+                services=self.services,
+                user=user,
+                identity_file=identity_file,
+                cluster=self,
+                ssh_clients={self.master_ip: master_ssh_client})
+            hosts = [self.master_ip] + self.slave_ips
+
+            run_against_hosts(partial_func=partial_func, hosts=hosts)
+
             for service in self.services:
                 service.configure_master(
                     ssh_client=master_ssh_client,
                     cluster=self)
 
-        for service in self.services:
-            service.health_check(master_host=self.master_ip)
+        check_services_health(services=self.services, master_host=self.master_ip)
 
     def stop_check(self):
         """
@@ -375,7 +407,9 @@ class FlintrockCluster:
             command=command)
         hosts = target_hosts
 
-        run_against_hosts(partial_func=partial_func, hosts=hosts)
+        # A user command can fail on several nodes at once, so we report every
+        # failure rather than just the first.
+        run_against_hosts(partial_func=partial_func, hosts=hosts, summarize_failures=True)
 
     def copy_file_check(self):
         """
@@ -400,20 +434,35 @@ class FlintrockCluster:
 
         If master_only is True, then copy the file to the master only.
         """
-        if master_only:
-            target_hosts = [self.master_ip]
-        else:
-            target_hosts = [self.master_ip] + self.slave_ips
+        if master_only or not self.slave_ips:
+            copy_file_node(
+                user=user,
+                host=self.master_ip,
+                identity_file=identity_file,
+                local_path=local_path,
+                remote_path=remote_path)
+            return
 
-        partial_func = functools.partial(
-            copy_file_node,
+        # We upload the file just once, to the master, and have the master
+        # forward it to the slaves over the cluster's internal network. This
+        # way, we don't send the same bytes from the client once per node.
+        master_ssh_client = get_ssh_client(
             user=user,
-            identity_file=identity_file,
-            local_path=local_path,
-            remote_path=remote_path)
-        hosts = target_hosts
+            host=self.master_ip,
+            identity_file=identity_file)
 
-        run_against_hosts(partial_func=partial_func, hosts=hosts)
+        with master_ssh_client:
+            copy_file_node(
+                user=user,
+                host=self.master_ip,
+                identity_file=identity_file,
+                local_path=local_path,
+                remote_path=remote_path,
+                ssh_clients={self.master_ip: master_ssh_client})
+            forward_file_from_master(
+                ssh_client=master_ssh_client,
+                remote_path=remote_path,
+                hosts=self.slave_private_hosts)
 
     def login(
             self,
@@ -485,38 +534,131 @@ def generate_template_mapping(
     return template_mapping
 
 
-# TODO: Cache these files. (?) They are being read potentially tens or
-#       hundreds of times. Maybe it doesn't matter because the files
-#       are so small.
-def get_formatted_template(*, path: str, mapping: dict) -> str:
+@functools.lru_cache()
+def _read_template(path: str) -> str:
+    # Templates are formatted once per node, so we read each file only once.
     with open(path) as f:
-        formatted = f.read().format(**mapping)
-    return formatted
+        return f.read()
 
 
-def run_against_hosts(*, partial_func: functools.partial, hosts: list):
+def get_formatted_template(*, path: str, mapping: dict) -> str:
+    return _read_template(path).format(**mapping)
+
+
+def run_against_hosts(
+        *,
+        partial_func: functools.partial,
+        hosts: list,
+        summarize_failures: bool=False):
     """
     Run a function asynchronously against each of the provided hosts.
 
     This function assumes that partial_func accepts `host` as a keyword argument.
+
+    This function always waits for every host to finish before it returns or
+    raises. By default, it logs the first error as soon as it happens and
+    re-raises that error at the end. If summarize_failures is True, it instead
+    logs each failure and raises an error that summarizes them.
     """
-    with concurrent.futures.ThreadPoolExecutor(len(hosts)) as executor:
+    # We size the pool to the number of hosts rather than take the default,
+    # which is capped by the number of local CPUs. The work here is almost all
+    # waiting on the network, so anything smaller would run hosts in waves.
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=len(hosts),
+        thread_name_prefix='flintrock',
+    ) as executor:
         futures = {
-            executor.submit(functools.partial(partial_func, host=host))
+            executor.submit(functools.partial(partial_func, host=host)): host
             for host in hosts
         }
-        concurrent.futures.wait(futures, return_when=FIRST_EXCEPTION)
-        for future in futures:
-            future.result()
+        if summarize_failures:
+            concurrent.futures.wait(futures)
+            _raise_host_failures(futures)
+        else:
+            (done, not_done) = concurrent.futures.wait(futures, return_when=FIRST_EXCEPTION)
+            failed = [future for future in done if future.exception() is not None]
+            # NOTE: Every host starts right away, so there is nothing left to
+            #       cancel when one fails. We still wait for the others, since
+            #       they may be using SSH clients or instances that the caller
+            #       is about to close or clean up. We log the failure now so
+            #       the user isn't left waiting without knowing why.
+            if failed and not_done:
+                _log_host_failure(host=futures[failed[0]], e=failed[0].exception())
+                logger.info(
+                    "Waiting for {n} other host{s} to finish...".format(
+                        n=len(not_done),
+                        s='' if len(not_done) == 1 else 's'))
+            concurrent.futures.wait(not_done)
+            for future in failed:
+                future.result()
+            for future in futures:
+                future.result()
+
+
+def _raise_host_failures(futures: dict):
+    """
+    Log the error from each failed future, and then raise an error that
+    summarizes them.
+
+    futures maps each finished future to the host it ran against.
+    """
+    failures = [
+        (host, future.exception())
+        for (future, host) in futures.items()
+        if future.exception() is not None
+    ]
+    for (host, e) in failures:
+        _log_host_failure(host=host, e=e)
+    if failures:
+        raise Error(
+            "Failed on {f} of {n} hosts."
+            .format(f=len(failures), n=len(futures))
+        ) from failures[0][1]
+
+
+def _log_host_failure(*, host: str, e: BaseException):
+    if isinstance(e, SSHError):
+        # SSHError messages already name the host.
+        logger.error(str(e))
+    else:
+        logger.error("[{h}] {e}".format(h=host, e=e))
+
+
+def check_services_health(*, services: list, master_host: str, timeout_seconds: float=120):
+    """
+    Run each service's health check against the cluster master, retrying with
+    backoff until the checks pass or we run out of time.
+
+    A service can take a few seconds to answer requests after its master starts
+    listening, so a single failed check right after startup doesn't mean much.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    for service in services:
+        delay = 1
+        while True:
+            try:
+                service.health_check(master_host=master_host)
+                break
+            except Exception as e:
+                if time.monotonic() + delay > deadline:
+                    raise
+                logger.debug(
+                    "{s} health check failed. Retrying...: {e}"
+                    .format(s=type(service).__name__, e=e))
+            # We add jitter so that retries against the same master don't
+            # line up with other clients polling it.
+            time.sleep(delay * random.uniform(1, 1.5))
+            delay = min(delay * 2, 10)
 
 
 def get_installed_java_version(client: paramiko.client.SSHClient):
     """
     :return: the major version (5,6,7,8...) of the currently installed Java or None if not installed
     """
+    # NOTE: java prints its version to stderr.
     possible_cmds = [
-        "$JAVA_HOME/bin/java -version",
-        "java -version"
+        "$JAVA_HOME/bin/java -version 2>&1",
+        "java -version 2>&1"
     ]
 
     for command in possible_cmds:
@@ -600,14 +742,32 @@ def ensure_java(client: paramiko.client.SSHClient, java_version: int):
         """.format(jp=java_package))
 
 
+@functools.lru_cache()
+def _read_script(script: str) -> bytes:
+    """
+    Read one of the scripts we upload to nodes. Every node gets the same
+    scripts, so we read each one from disk only once.
+    """
+    with open(os.path.join(SCRIPTS_DIR, script), 'rb') as f:
+        return f.read()
+
+
+def _put_script(*, sftp: paramiko.sftp_client.SFTPClient, script: str):
+    """
+    Upload one of Flintrock's scripts to /tmp on a node.
+    """
+    contents = _read_script(script)
+    sftp.putfo(
+        fl=io.BytesIO(contents),
+        remotepath=posixpath.join('/tmp', script),
+        file_size=len(contents))
+
+
 def install_adoptium_repo(client):
     """
     Installs the adoptium.repo file into /etc/yum.repos.d/
     """
-    with client.open_sftp() as sftp:
-        sftp.put(
-            localpath=os.path.join(SCRIPTS_DIR, 'adoptium.repo'),
-            remotepath='/tmp/adoptium.repo')
+    _put_script(sftp=get_sftp_client(client), script='adoptium.repo')
     ssh_check_output(
         client=client,
         command="""
@@ -633,7 +793,27 @@ def setup_node(
     delegate the main work of setting up new nodes to this function.
     """
     host = ssh_client.get_transport().getpeername()[0]
-    ssh_check_output(
+
+    # We upload all the scripts the node will need here, rather than have each
+    # service upload the same files.
+    sftp = get_sftp_client(ssh_client)
+    for script in ['setup-ephemeral-storage.py', 'download-package.py']:
+        _put_script(sftp=sftp, script=script)
+
+    logger.info("[{h}] Configuring ephemeral storage...".format(h=host))
+    # We install the cluster's SSH key pair in the same command as the storage
+    # setup to save a round trip.
+    # NOTE: Storage setup and the Python and Java installs below don't depend
+    #       on each other, so we run storage setup on its own channel of the
+    #       same SSH connection while the installs proceed.
+    # TODO: Print some kind of warning if storage is large, since formatting
+    #       will take several minutes (~4 minutes for 2TB).
+    storage_executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=1,
+        thread_name_prefix='flintrock',
+    )
+    storage_dirs_future = storage_executor.submit(
+        ssh_check_output,
         client=ssh_client,
         command="""
             set -e
@@ -642,42 +822,35 @@ def setup_node(
             echo {public_key} >> "$HOME/.ssh/authorized_keys"
 
             chmod 400 "$HOME/.ssh/id_rsa"
-        """.format(
-            private_key=shlex.quote(cluster.ssh_key_pair.private),
-            public_key=shlex.quote(cluster.ssh_key_pair.public)))
-
-    with ssh_client.open_sftp() as sftp:
-        sftp.put(
-            localpath=os.path.join(SCRIPTS_DIR, 'setup-ephemeral-storage.py'),
-            remotepath='/tmp/setup-ephemeral-storage.py')
 
-    logger.info("[{h}] Configuring ephemeral storage...".format(h=host))
-    # TODO: Print some kind of warning if storage is large, since formatting
-    #       will take several minutes (~4 minutes for 2TB).
-    storage_dirs_raw = ssh_check_output(
-        client=ssh_client,
-        command="""
-            set -e
             python /tmp/setup-ephemeral-storage.py
             rm -f /tmp/setup-ephemeral-storage.py
-        """)
-    storage_dirs = json.loads(storage_dirs_raw)
-
-    cluster.storage_dirs.root = storage_dirs['root']
-    cluster.storage_dirs.ephemeral = storage_dirs['ephemeral']
+        """.format(
+            private_key=shlex.quote(cluster.ssh_key_pair.private),
+            public_key=shlex.quote(cluster.ssh_key_pair.public)))
+    storage_executor.shutdown(wait=False)
 
     # TODO: Move Python and Java setup to new service under services.py.
     #       New service to cover Python/Scala/Java: LanguageRuntimes (name?)
-    ssh_check_output(
-        client=ssh_client,
-        command=(
-            """
-            set -e
-            sudo yum install -y python3
-            """
+    try:
+        ssh_check_output(
+            client=ssh_client,
+            command=(
+                """
+                set -e
+                sudo yum install -y python3
+                """
+            )
         )
-    )
-    ensure_java(ssh_client, java_version)
+        ensure_java(ssh_client, java_version)
+    finally:
+        # Whatever happens, don't leave storage setup running unobserved. We
+        # only wait here, so that a storage error doesn't mask an install error.
+        concurrent.futures.wait([storage_dirs_future])
+    storage_dirs = json.loads(storage_dirs_future.result())
+
+    cluster.storage_dirs.root = storage_dirs['root']
+    cluster.storage_dirs.ephemeral = storage_dirs['ephemeral']
 
     for service in services:
         try:
@@ -692,6 +865,30 @@ def setup_node(
             ) from e
 
 
+def _get_node_ssh_client(
+        *,
+        ssh_clients: dict=None,
+        user: str,
+        host: str,
+        identity_file: str,
+        wait: bool=True):
+    """
+    Get an SSH client for a node, reusing one from ssh_clients if possible.
+
+    Return the client along with a context manager for the caller to use. It
+    closes the client on exit only if we opened the client here.
+    """
+    if ssh_clients and host in ssh_clients:
+        return (ssh_clients[host], contextlib.nullcontext())
+    else:
+        client = get_ssh_client(
+            user=user,
+            host=host,
+            identity_file=identity_file,
+            wait=wait)
+        return (client, client)
+
+
 def provision_cluster(
         *,
         cluster: FlintrockCluster,
@@ -702,23 +899,30 @@ def provision_cluster(
     """
     Connect to a freshly launched cluster and install the specified services.
     """
-    partial_func = functools.partial(
-        provision_node,
-        java_version=java_version,
-        services=services,
-        user=user,
-        identity_file=identity_file,
-        cluster=cluster)
-    hosts = [cluster.master_ip] + cluster.slave_ips
-
-    run_against_hosts(partial_func=partial_func, hosts=hosts)
-
+    # We open the master connection up front so that provisioning the master
+    # and configuring it afterwards share a single SSH handshake.
     master_ssh_client = get_ssh_client(
         user=user,
         host=cluster.master_ip,
-        identity_file=identity_file)
+        identity_file=identity_file,
+        wait=True)
 
     with master_ssh_client:
+        # Keep the connection alive while it sits idle waiting on the slaves.
+        master_ssh_client.get_transport().set_keepalive(30)
+
+        partial_func = functools.partial(
+            provision_node,
+            java_version=java_version,
+            services=services,
+            user=user,
+            identity_file=identity_file,
+            cluster=cluster,
+            ssh_clients={cluster.master_ip: master_ssh_client})
+        hosts = [cluster.master_ip] + cluster.slave_ips
+
+        run_against_hosts(partial_func=partial_func, hosts=hosts)
+
         manifest = {
             'java_version': java_version,
             'services': [[type(m).__name__, m.manifest] for m in services],
@@ -726,22 +930,21 @@ def provision_cluster(
         }
         # The manifest tells us how the cluster is configured. We'll need this
         # when we resize the cluster or restart it.
-        ssh_check_output(
-            client=master_ssh_client,
-            command="""
-                echo {m} > "$HOME/.flintrock-manifest.json"
-                chmod go-rw "$HOME/.flintrock-manifest.json"
-            """.format(
-                m=shlex.quote(json.dumps(manifest, indent=4, sort_keys=True))
-            ))
+        # NOTE: We write the manifest over SFTP rather than echo it through the
+        #       shell, so it doesn't need quoting. Relative SFTP paths are
+        #       relative to the user's home directory. The manifest includes
+        #       the cluster's private key, so we restrict its permissions
+        #       before writing anything to it.
+        with get_sftp_client(master_ssh_client).open('.flintrock-manifest.json', 'w') as f:
+            f.chmod(0o600)
+            f.write(json.dumps(manifest, indent=4, sort_keys=True) + '\n')
 
         for service in services:
             service.configure_master(
                 ssh_client=master_ssh_client,
                 cluster=cluster)
 
-    for service in services:
-        service.health_check(master_host=cluster.master_ip)
+    check_services_health(services=services, master_host=cluster.master_ip)
 
 
 def provision_node(
@@ -751,21 +954,25 @@ def provision_node(
         user: str,
         host: str,
         identity_file: str,
-        cluster: FlintrockCluster):
+        cluster: FlintrockCluster,
+        ssh_clients: dict=None):
     """
     Connect to a freshly launched node, set it up for SSH access, configure ephemeral
     storage, and install the specified services.
 
+    ssh_clients maps hosts to SSH clients the caller has already opened. If host
+    is among them, we use that client and leave it open for the caller.
+
     This method is role-agnostic; it runs on both the cluster master and slaves.
     This method is meant to be called asynchronously.
     """
-    client = get_ssh_client(
+    client, client_context = _get_node_ssh_client(
+        ssh_clients=ssh_clients,
         user=user,
         host=host,
-        identity_file=identity_file,
-        wait=True)
+        identity_file=identity_file)
 
-    with client:
+    with client_context:
         setup_node(
             ssh_client=client,
             services=services,
@@ -783,21 +990,24 @@ def start_node(
         user: str,
         host: str,
         identity_file: str,
-        cluster: FlintrockCluster):
+        cluster: FlintrockCluster,
+        ssh_clients: dict=None):
     """
     Connect to an existing node that has just been started up again and prepare it for
     work.
 
+    ssh_clients works as it does for provision_node().
+
     This method is role-agnostic; it runs on both the cluster master and slaves.
     This method is meant to be called asynchronously.
     """
-    ssh_client = get_ssh_client(
+    ssh_client, client_context = _get_node_ssh_client(
+        ssh_clients=ssh_clients,
         user=user,
         host=host,
-        identity_file=identity_file,
-        wait=True)
+        identity_file=identity_file)
 
-    with ssh_client:
+    with client_context:
         # TODO: Consider consolidating ephemeral storage code under a dedicated
         #       Flintrock service.
         if cluster.storage_dirs.ephemeral:
@@ -893,10 +1103,14 @@ def run_command_node(*, user: str, host: str, identity_file: str, command: tuple
 
     command_str = ' '.join(command)
 
+    # NOTE: We run user commands in a pty, so that a command that starts
+    #       something in the background returns when the shell exits, rather
+    #       than when the background process does.
     with ssh_client:
         ssh_check_output(
             client=ssh_client,
-            command=command_str)
+            command=command_str,
+            get_pty=True)
 
     logger.info("[{h}] Command complete.".format(h=host))
 
@@ -907,39 +1121,180 @@ def copy_file_node(
         host: str,
         identity_file: str,
         local_path: str,
-        remote_path: str):
+        remote_path: str,
+        ssh_clients: dict=None):
     """
     Copy a file to the specified remote path on a node.
 
+    ssh_clients maps hosts to SSH clients the caller has already opened. If host
+    is among them, we use that client and leave it open for the caller.
+
     This method is role-agnostic; it runs on both the cluster master and slaves.
     This method is meant to be called asynchronously.
     """
-    ssh_client = get_ssh_client(
+    ssh_client, client_context = _get_node_ssh_client(
+        ssh_clients=ssh_clients,
         user=user,
         host=host,
-        identity_file=identity_file)
+        identity_file=identity_file,
+        wait=False)
 
-    with ssh_client:
-        remote_dir = posixpath.dirname(remote_path)
+    file_size = os.path.getsize(local_path)
 
-        try:
-            ssh_check_output(
-                client=ssh_client,
-                command="""
-                    test -d {path}
-                """.format(path=shlex.quote(remote_dir)))
-        except Exception as e:
-            # TODO: Catch more specific exception.
-            raise Exception("Remote directory does not exist: {d}".format(d=remote_dir))
+    with client_context:
+        remote_dir = posixpath.dirname(remote_path)
 
         with ssh_client.open_sftp() as sftp:
+            # We check the remote directory over SFTP rather than run a separate
+            # remote command, which would cost an extra channel and round trip.
+            try:
+                remote_dir_is_dir = stat.S_ISDIR(sftp.stat(remote_dir).st_mode)
+            except OSError:
+                remote_dir_is_dir = False
+            if not remote_dir_is_dir:
+                raise Exception("Remote directory does not exist: {d}".format(d=remote_dir))
+
             logger.info("[{h}] Copying file...".format(h=host))
 
-            sftp.put(localpath=local_path, remotepath=remote_path)
+            # NOTE: put() pipelines its writes, so it doesn't wait on a round
+            #       trip for each chunk of the file.
+            if file_size > PARALLEL_UPLOAD_THRESHOLD_BYTES:
+                _put_file_in_parallel(
+                    ssh_client=ssh_client,
+                    sftp=sftp,
+                    local_path=local_path,
+                    file_size=file_size,
+                    remote_path=remote_path)
+            else:
+                sftp.put(localpath=local_path, remotepath=remote_path)
 
             logger.info("[{h}] Copy complete.".format(h=host))
 
 
+def _put_file_range(
+        *,
+        ssh_client: paramiko.client.SSHClient,
+        local_path: str,
+        remote_path: str,
+        offset: int,
+        length: int):
+    """
+    Upload one byte range of a local file into an existing remote file, over its
+    own SFTP channel.
+    """
+    bytes_written = 0
+    with ssh_client.open_sftp() as sftp, \
+            sftp.open(remote_path, 'r+b') as remote_file, \
+            open(local_path, 'rb') as local_file:
+        remote_file.set_pipelined(True)
+        remote_file.seek(offset)
+        local_file.seek(offset)
+        while bytes_written < length:
+            data = local_file.read(min(length - bytes_written, remote_file.MAX_REQUEST_SIZE))
+            if not data:
+                break
+            remote_file.write(data)
+            bytes_written += len(data)
+
+    # NOTE: The remote file was already truncated to its full size, so a range
+    #       that comes up short leaves a hole that a size check wouldn't catch.
+    if bytes_written != length:
+        raise IOError(
+            "Short write while copying file at offset {o}: {w} != {l}"
+            .format(o=offset, w=bytes_written, l=length))
+
+
+def _put_file_in_parallel(
+        *,
+        ssh_client: paramiko.client.SSHClient,
+        sftp: paramiko.sftp_client.SFTPClient,
+        local_path: str,
+        file_size: int,
+        remote_path: str):
+    """
+    Upload a large file by splitting it into ranges that we write concurrently,
+    each over its own SFTP channel of the same SSH connection.
+
+    The server limits how much unacknowledged data each channel can have in
+    flight, so on high-latency links a single channel can't use all the
+    available bandwidth.
+    """
+    range_length = -(-file_size // PARALLEL_UPLOAD_CHANNELS)
+
+    with sftp.open(remote_path, 'wb') as remote_file:
+        remote_file.truncate(file_size)
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=PARALLEL_UPLOAD_CHANNELS,
+        thread_name_prefix='flintrock',
+    ) as executor:
+        futures = [
+            executor.submit(
+                _put_file_range,
+                ssh_client=ssh_client,
+                local_path=local_path,
+                remote_path=remote_path,
+                offset=offset,
+                length=min(range_length, file_size - offset))
+            for offset in range(0, file_size, range_length)
+        ]
+        for future in futures:
+            future.result()
+
+
+def forward_file_from_master(
+        *,
+        ssh_client: paramiko.client.SSHClient,
+        remote_path: str,
+        hosts: list):
+    """
+    Copy a file that's already on the master to the same path on each of the
+    provided hosts.
+
+    The copies go out in parallel over the cluster's internal network, using the
+    SSH key pair that Flintrock set up for intra-cluster communication.
+    """
+    master_host = ssh_client.get_transport().getpeername()[0]
+    logger.info("[{h}] Forwarding file to slaves...".format(h=master_host))
+
+    ssh_check_output(
+        client=ssh_client,
+        command=_forward_file_command(remote_path=remote_path, hosts=hosts))
+
+    logger.info("[{h}] Forwarding complete.".format(h=master_host))
+
+
+def _forward_file_command(*, remote_path: str, hosts: list) -> str:
+    """
+    Build the shell command that forward_file_from_master() runs on the master.
+    """
+    # NOTE: We prefix each line of scp's output with the host it came from, since
+    #       it doesn't say so itself.
+    # NOTE: Each copy runs in a subshell that exits with scp's own status. $! is
+    #       the PID of the last command in a pipeline, so waiting on a bare
+    #       `scp | sed` job could report sed's status instead of scp's once
+    #       bash has already reaped the job.
+    return """
+        pids=()
+        for host in {hosts}; do
+            (
+                scp -q -o StrictHostKeyChecking=no -o ConnectTimeout=5 \\
+                    {path} "$host":{path} 2>&1 | sed "s/^/[$host] /"
+                exit "${{PIPESTATUS[0]}}"
+            ) &
+            pids+=("$!")
+        done
+
+        failed=0
+        for pid in "${{pids[@]}}"; do
+            wait "$pid" || failed=1
+        done
+        exit "$failed"
+    """.format(
+        hosts=' '.join(shlex.quote(host) for host in hosts),
+        path=shlex.quote(remote_path))
+
+
 # This is necessary down here since we have a circular import dependency between
 # core.py and services.py. I've thought about how to remove this circular dependency,
 # but for now this seems like what we need to go with.
@@ -1,3 +1,5 @@
+import concurrent.futures
+import copy
 import functools
 import string
 import sys
@@ -47,6 +49,39 @@ class ConfigurationNotSupported(Error):
         super().__init__(message)
 
 
+@functools.lru_cache()
+def get_ec2_resource(region: str) -> 'boto3.resources.factory.ec2.ServiceResource':
+    """
+    Get an EC2 resource for the provided region.
+
+    Creating a resource means loading and parsing the EC2 service model, which
+    is slow. A single Flintrock command may need a resource a dozen times, so we
+    create one per region and reuse it. Resources are not thread-safe, so use
+    this from the main thread only.
+    """
+    return boto3.resource(service_name='ec2', region_name=region)
+
+
+@functools.lru_cache()
+def get_ec2_image(*, region: str, ami: str) -> 'boto3.resources.factory.ec2.Image':
+    """
+    Get an AMI by ID. AMIs are immutable, so we only look each one up once.
+    """
+    ec2 = get_ec2_resource(region)
+    try:
+        image = list(
+            ec2.images.filter(
+                Filters=[
+                    {'Name': 'image-id', 'Values': [ami]}
+                ]))[0]
+    except IndexError as e:
+        raise Error(
+            "Error: Could not find {ami} in region {region}.".format(
+                ami=ami,
+                region=region))
+    return image
+
+
 def timeit(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
@@ -58,6 +93,32 @@ def timeit(func):
     return wrapper
 
 
+def _get_instance_state_waiter(*, client, state: str) -> botocore.waiter.Waiter:
+    """
+    Build a waiter that waits for every matching instance to reach the provided
+    state, and never gives up early because of the state an instance is in.
+    """
+    waiter_model = botocore.waiter.WaiterModel({
+        'version': 2,
+        'waiters': {
+            'InstanceState': {
+                'operation': 'DescribeInstances',
+                'delay': 3,
+                'maxAttempts': 400,
+                'acceptors': [
+                    {
+                        'matcher': 'pathAll',
+                        'argument': 'Reservations[].Instances[].State.Name',
+                        'expected': state,
+                        'state': 'success',
+                    },
+                ],
+            },
+        },
+    })
+    return botocore.waiter.create_waiter_with_client('InstanceState', waiter_model, client)
+
+
 class EC2Cluster(FlintrockCluster):
     def __init__(
             self,
@@ -83,7 +144,7 @@ class EC2Cluster(FlintrockCluster):
     @property
     @functools.lru_cache()
     def private_network(self) -> bool:
-        ec2 = boto3.resource(service_name='ec2', region_name=self.region)
+        ec2 = get_ec2_resource(self.region)
         if self.master_instance:
             reference_instance = self.master_instance
         else:
@@ -152,30 +213,51 @@ class EC2Cluster(FlintrockCluster):
         This method updates the cluster's instance metadata and
         master and slave IP addresses and hostnames.
         """
-        ec2 = boto3.resource(service_name='ec2', region_name=self.region)
-
-        while any([i.state['Name'] != state for i in self.instances]):
-            if logger.isEnabledFor(logging.DEBUG):
-                waiting_instances = [i for i in self.instances if i.state['Name'] != state]
-                sample = ', '.join(["'{}'".format(i.id) for i in waiting_instances][:3])
-                logger.debug("{size} instances not in state '{state}': {sample}, ...".format(size=len(waiting_instances), state=state, sample=sample))
-            time.sleep(3)
-            # Update metadata for all instances in one shot. We don't want
-            # to make a call to AWS for each of potentially hundreds of
-            # instances.
-            instances = list(
-                ec2.instances.filter(
-                    # NOTE: We use Filters instead of InstanceIds to avoid
-                    #       the issue described here: https://github.com/boto/boto3/issues/479
-                    Filters=[
-                        {'Name': 'instance-id', 'Values': [i.id for i in self.instances]}
-                    ]))
-            (self.master_instance, self.slave_instances) = _get_cluster_master_slaves(instances)
+        ec2 = get_ec2_resource(self.region)
+        instance_filters = [
+            # NOTE: We use Filters instead of InstanceIds to avoid
+            #       the issue described here: https://github.com/boto/boto3/issues/479
+            {'Name': 'instance-id', 'Values': [i.id for i in self.instances]}
+        ]
+
+        logger.debug(
+            "Waiting for {size} instances to reach state '{state}'..."
+            .format(size=len(self.instances), state=state))
+        # The waiter checks all instances with one call per attempt.
+        # NOTE: boto3's stock waiters also fail as soon as any instance is in a
+        #       state they consider unrecoverable. That's what we want when
+        #       we're waiting for 'running' and an instance terminates, but the
+        #       stock 'instance_terminated' and 'instance_stopped' waiters also
+        #       fail on instances that are 'pending' or 'stopping', which is
+        #       fine for us to wait out, e.g. when destroying a cluster that's
+        #       still starting up.
+        if state == 'running':
+            waiter = ec2.meta.client.get_waiter('instance_running')
+        else:
+            waiter = _get_instance_state_waiter(client=ec2.meta.client, state=state)
+        try:
+            waiter.wait(
+                Filters=instance_filters,
+                WaiterConfig={
+                    'Delay': 3,
+                    'MaxAttempts': 400,
+                })
+        except botocore.exceptions.WaiterError as e:
+            raise Error(
+                "Error: Cluster {c} did not reach state '{s}'. {e}"
+                .format(c=self.name, s=state, e=e)
+            ) from e
+
+        # Update metadata for all instances in one shot. We don't want
+        # to make a call to AWS for each of potentially hundreds of
+        # instances.
+        instances = list(ec2.instances.filter(Filters=instance_filters))
+        (self.master_instance, self.slave_instances) = _get_cluster_master_slaves(instances)
 
     def destroy(self):
         self.destroy_check()
         super().destroy()
-        ec2 = boto3.resource(service_name='ec2', region_name=self.region)
+        ec2 = get_ec2_resource(self.region)
 
         flintrock_base_group = get_base_security_group(vpc_id=self.vpc_id, region=self.region)
 
@@ -183,11 +265,11 @@ class EC2Cluster(FlintrockCluster):
         # 'flintrock-clustername' group) so that we can immediately delete it once
         # the instances are terminated. If we don't do this, we get dependency
         # violations for a couple of minutes before we can actually delete the group.
-        # TODO: Is there a way to do this in one call for all instances?
-        #       Do we need to throttle these calls?
-        for instance in self.instances:
-            instance.modify_attribute(
-                Groups=[flintrock_base_group.id])
+        _set_security_groups(
+            instances=self.instances,
+            group_ids=[flintrock_base_group.id],
+            region=self.region,
+        )
         time.sleep(1)
 
         cluster_group = get_cluster_security_group(
@@ -220,7 +302,7 @@ class EC2Cluster(FlintrockCluster):
     def start(self, *, user: str, identity_file: str):
         # TODO: Do these _check() methods make sense here?
         self.start_check()
-        ec2 = boto3.resource(service_name='ec2', region_name=self.region)
+        ec2 = get_ec2_resource(self.region)
         (ec2.instances
             .filter(
                 Filters=[
@@ -246,7 +328,7 @@ class EC2Cluster(FlintrockCluster):
         self.stop_check()
         super().stop()
 
-        ec2 = boto3.resource(service_name='ec2', region_name=self.region)
+        ec2 = get_ec2_resource(self.region)
         (ec2.instances
             .filter(
                 Filters=[
@@ -282,7 +364,7 @@ class EC2Cluster(FlintrockCluster):
             region=self.region)
         availability_zone = self.master_instance.placement['AvailabilityZone']
 
-        ec2 = boto3.resource(service_name='ec2', region_name=self.region)
+        ec2 = get_ec2_resource(self.region)
         client = ec2.meta.client
 
         response = client.describe_instance_attribute(
@@ -330,7 +412,10 @@ class EC2Cluster(FlintrockCluster):
                 user_data=user_data,
                 tag_specifications=_tag_specs(self.name, 'slave', tags),
             )
-            time.sleep(3)
+            _wait_for_instances_to_exist(
+                instances=new_slave_instances,
+                region=self.region,
+            )
 
             existing_slaves = self.slave_ips
 
@@ -360,7 +445,7 @@ class EC2Cluster(FlintrockCluster):
 
     @timeit
     def remove_slaves(self, *, user: str, identity_file: str, num_slaves: int):
-        ec2 = boto3.resource(service_name='ec2', region_name=self.region)
+        ec2 = get_ec2_resource(self.region)
 
         # self.remove_slaves_check() (?)
 
@@ -380,10 +465,11 @@ class EC2Cluster(FlintrockCluster):
             region=self.region,
         )
 
-        # TODO: Is there a way to do this in one call for all instances?
-        for instance in removed_slave_instances:
-            instance.modify_attribute(
-                Groups=[flintrock_base_group.id])
+        _set_security_groups(
+            instances=removed_slave_instances,
+            group_ids=[flintrock_base_group.id],
+            region=self.region,
+        )
 
         (ec2.instances
             .filter(
@@ -448,7 +534,7 @@ def get_default_vpc(region: str) -> 'boto3.resources.factory.ec2.Vpc':
     """
     Get the user's default VPC in the provided region.
     """
-    ec2 = boto3.resource(service_name='ec2', region_name=region)
+    ec2 = get_ec2_resource(region)
 
     default_vpc = list(
         ec2.vpcs.filter(
@@ -465,7 +551,7 @@ def check_network_config(*, region_name: str, vpc_id: str, subnet_id: str):
     Check that the VPC and subnet are configured to allow Flintrock to create
     clusters.
     """
-    ec2 = boto3.resource(service_name='ec2', region_name=region_name)
+    ec2 = get_ec2_resource(region_name)
 
     if not ec2.Vpc(vpc_id).describe_attribute(Attribute='enableDnsHostnames')['EnableDnsHostnames']['Value']:
         raise ConfigurationNotSupported(
@@ -490,7 +576,7 @@ def get_base_security_group(*, vpc_id, region):
     The base Flintrock group is common to all Flintrock clusters and authorizes client traffic
     to them.
     """
-    ec2 = boto3.resource(service_name='ec2', region_name=region)
+    ec2 = get_ec2_resource(region)
     base_group = list(
         ec2.security_groups.filter(
             Filters=[
@@ -511,7 +597,7 @@ def get_cluster_security_group(*, vpc_id, region, cluster_name):
     The cluster group is specific to one Flintrock cluster and authorizes intra-cluster
     communication.
     """
-    ec2 = boto3.resource(service_name='ec2', region_name=region)
+    ec2 = get_ec2_resource(region)
     cluster_group_name = get_cluster_security_group_name(cluster_name)
     cluster_group = list(
         ec2.security_groups.filter(
@@ -528,7 +614,7 @@ def get_security_groups(
     region,
     security_group_names,
 ):
-    ec2 = boto3.resource(service_name='ec2', region_name=region)
+    ec2 = get_ec2_resource(region)
     groups = list(
         ec2.security_groups.filter(
             Filters=[
@@ -564,6 +650,98 @@ def get_ssh_security_group_rules(
     )
 
 
+@functools.lru_cache()
+def get_client_ip() -> str:
+    """
+    Get the public IP address of the machine running Flintrock.
+
+    The answer won't change over the life of the process, so we only ask once.
+    """
+    return (
+        urllib.request.urlopen('https://checkip.amazonaws.com/')
+        .read().decode('utf-8').strip()
+    )
+
+
+def _security_group_rule_to_ip_permission(rule: SecurityGroupRule) -> dict:
+    ip_permission = {
+        'IpProtocol': rule.ip_protocol,
+        'FromPort': rule.from_port,
+        'ToPort': rule.to_port,
+    }
+    if rule.cidr_ip:
+        ip_permission['IpRanges'] = [{'CidrIp': rule.cidr_ip}]
+    else:
+        ip_permission['UserIdGroupPairs'] = [{'GroupId': rule.src_group}]
+    return ip_permission
+
+
+def _ip_permission_keys(ip_permission: dict) -> set:
+    """
+    Flatten an EC2 IP permission into hashable keys, one per source.
+
+    EC2 omits the ports when describing rules that cover all protocols, so we
+    ignore them in that case.
+    """
+    protocol = ip_permission['IpProtocol']
+    if protocol == '-1':
+        ports = (None, None)
+    else:
+        ports = (ip_permission.get('FromPort'), ip_permission.get('ToPort'))
+    return (
+        {(protocol, *ports, r['CidrIp']) for r in ip_permission.get('IpRanges', [])}
+        | {(protocol, *ports, p['GroupId']) for p in ip_permission.get('UserIdGroupPairs', [])}
+    )
+
+
+def _set_security_groups(*, instances: list, group_ids: list, region: str):
+    """
+    Replace the security groups of each of the provided instances.
+
+    EC2 only lets us modify one instance per call, so we make the calls
+    concurrently. We cap the concurrency to stay well clear of EC2's API
+    rate limits, and botocore retries any calls that get throttled anyway.
+    """
+    if not instances:
+        return
+
+    # NOTE: We use the client rather than the instance resources since boto3
+    #       clients are thread-safe and resources are not.
+    client = get_ec2_resource(region).meta.client
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(len(instances), 10),
+        thread_name_prefix='flintrock',
+    ) as executor:
+        futures = [
+            executor.submit(
+                client.modify_instance_attribute,
+                InstanceId=instance.id,
+                Groups=group_ids,
+            )
+            for instance in instances
+        ]
+        for future in futures:
+            future.result()
+
+
+def _get_missing_ip_permissions(*, existing: list, wanted: list) -> list:
+    """
+    Get the IP permissions in wanted that are not already covered by existing.
+    """
+    seen_keys = set()
+    for ip_permission in existing:
+        seen_keys |= _ip_permission_keys(ip_permission)
+
+    missing = []
+    for ip_permission in wanted:
+        keys = _ip_permission_keys(ip_permission)
+        if not keys <= seen_keys:
+            missing.append(ip_permission)
+            seen_keys |= keys
+    return missing
+
+
 def get_or_create_flintrock_security_groups(
     *,
     cluster_name,
@@ -576,7 +754,7 @@ def get_or_create_flintrock_security_groups(
     If they do not already exist, create all the security groups needed for a
     Flintrock cluster.
     """
-    ec2 = boto3.resource(service_name='ec2', region_name=region)
+    ec2 = get_ec2_resource(region)
 
     flintrock_group = get_base_security_group(vpc_id=vpc_id, region=region)
     if not flintrock_group:
@@ -590,11 +768,7 @@ def get_or_create_flintrock_security_groups(
     if ec2_authorize_access_from:
         flintrock_client_sources = ec2_authorize_access_from
     else:
-        flintrock_client_ip = (
-            urllib.request.urlopen('https://checkip.amazonaws.com/')
-            .read().decode('utf-8').strip()
-        )
-        flintrock_client_sources = [flintrock_client_ip]
+        flintrock_client_sources = [get_client_ip()]
 
     client_rules = []
     for client_source in flintrock_client_sources:
@@ -632,33 +806,35 @@ def get_or_create_flintrock_security_groups(
             VpcId=vpc_id,
         )
 
-    # TODO: Don't try adding rules that already exist.
-    # TODO: Add rules in one shot.
-    for rule in client_rules:
+    ip_permissions = [_security_group_rule_to_ip_permission(rule) for rule in client_rules]
+    ip_permissions.append(
+        {
+            'IpProtocol': '-1',  # -1 means all
+            'FromPort': -1,
+            'ToPort': -1,
+            'UserIdGroupPairs': [{'GroupId': cluster_group.id}]
+        })
+
+    # We add all the rules in one shot, skipping the ones the group already
+    # has, since AWS rejects the whole call if any one rule is a duplicate.
+    missing_ip_permissions = _get_missing_ip_permissions(
+        existing=cluster_group.ip_permissions,
+        wanted=ip_permissions,
+    )
+    if missing_ip_permissions:
         try:
-            cluster_group.authorize_ingress(
-                IpProtocol=rule.ip_protocol,
-                FromPort=rule.from_port,
-                ToPort=rule.to_port,
-                CidrIp=rule.cidr_ip,
-                SourceSecurityGroupName=rule.src_group,
-            )
+            cluster_group.authorize_ingress(IpPermissions=missing_ip_permissions)
         except botocore.exceptions.ClientError as e:
             if e.response['Error']['Code'] != 'InvalidPermission.Duplicate':
-                raise Exception("Error adding rule: {r}".format(r=rule))
-
-    try:
-        cluster_group.authorize_ingress(
-            IpPermissions=[
-                {
-                    'IpProtocol': '-1',  # -1 means all
-                    'FromPort': -1,
-                    'ToPort': -1,
-                    'UserIdGroupPairs': [{'GroupId': cluster_group.id}]
-                }])
-    except botocore.exceptions.ClientError as e:
-        if e.response['Error']['Code'] != 'InvalidPermission.Duplicate':
-            raise Exception("Error authorizing cluster ingress to self.") from e
+                raise Exception("Error authorizing cluster ingress.") from e
+            # Someone else added some of these rules since we last looked.
+            # Fall back to adding them one at a time.
+            for ip_permission in missing_ip_permissions:
+                try:
+                    cluster_group.authorize_ingress(IpPermissions=[ip_permission])
+                except botocore.exceptions.ClientError as e:
+                    if e.response['Error']['Code'] != 'InvalidPermission.Duplicate':
+                        raise Exception("Error adding rule: {r}".format(r=ip_permission)) from e
 
     return [flintrock_group, cluster_group]
 
@@ -673,25 +849,14 @@ def get_ec2_block_device_mappings(
 
     This is how we configure storage on the instance.
     """
-    ec2 = boto3.resource(service_name='ec2', region_name=region)
+    image = get_ec2_image(region=region, ami=ami)
     block_device_mappings = []
 
-    try:
-        image = list(
-            ec2.images.filter(
-                Filters=[
-                    {'Name': 'image-id', 'Values': [ami]}
-                ]))[0]
-    except IndexError as e:
-        raise Error(
-            "Error: Could not find {ami} in region {region}.".format(
-                ami=ami,
-                region=region))
-
     if image.root_device_type == 'ebs':
-        root_device = [
+        # We copy the device since we modify it below, and the image is cached.
+        root_device = copy.deepcopy([
             device for device in image.block_device_mappings
-            if device['DeviceName'] == image.root_device_name][0]
+            if device['DeviceName'] == image.root_device_name][0])
         if root_device['Ebs']['VolumeSize'] < min_root_ebs_size_gb:
             root_device['Ebs'].update({
                 # Max root volume size for instance store-backed AMIs is 10 GiB.
@@ -735,7 +900,7 @@ def _create_instances(
     user_data,
     tag_specifications,
 ) -> 'List[boto3.resources.factory.ec2.Instance]':
-    ec2 = boto3.resource(service_name='ec2', region_name=region)
+    ec2 = get_ec2_resource(region)
 
     cluster_instances = []
     common_launch_specs = {
@@ -793,6 +958,45 @@ def _create_instances(
         raise InterruptedEC2Operation(instances=cluster_instances) from e
 
 
+def _wait_for_instances_to_exist(
+    *,
+    instances: list,
+    region: str,
+    timeout_seconds: int=60,
+):
+    """
+    Wait until EC2 can see all the provided, freshly created instances.
+
+    There is a small delay between when a create request returns and when
+    subsequent calls will see the new instances. Rather than sleep for a fixed
+    amount of time, we poll until they all show up, which is typically almost
+    immediately.
+    """
+    ec2 = get_ec2_resource(region)
+    instance_ids = {i.id for i in instances}
+    delay = 0.5
+    deadline = time.monotonic() + timeout_seconds
+
+    while True:
+        found_instance_ids = {
+            i.id for i in ec2.instances.filter(
+                Filters=[
+                    {'Name': 'instance-id', 'Values': list(instance_ids)}
+                ])
+        }
+        if found_instance_ids >= instance_ids:
+            return
+        if time.monotonic() > deadline:
+            raise Error(
+                "Timed out waiting for EC2 to report {n} new instance{s}."
+                .format(
+                    n=len(instance_ids - found_instance_ids),
+                    s='' if len(instance_ids - found_instance_ids) == 1 else 's',
+                ))
+        time.sleep(delay)
+        delay = min(delay * 2, 3)
+
+
 @timeit
 def launch(
         *,
@@ -864,7 +1068,7 @@ def launch(
         ami=ami,
         region=region)
 
-    ec2 = boto3.resource(service_name='ec2', region_name=region)
+    ec2 = get_ec2_resource(region)
     iam = boto3.resource(service_name='iam', region_name=region)
 
     # We use IAM profile ARNs internally because AWS's API prefers that in
@@ -919,7 +1123,10 @@ def launch(
             tag_specifications=slave_tags,
             **common_instance_spec,
         )
-        time.sleep(3)
+        _wait_for_instances_to_exist(
+            instances=[master_instance] + slave_instances,
+            region=region,
+        )
 
         cluster = EC2Cluster(
             name=cluster_name,
@@ -940,19 +1147,27 @@ def launch(
 
         return cluster
     except (Exception, KeyboardInterrupt) as e:
-        # If the interruption happens right after a request to create instances is
-        # made, we may not find all cluster nodes here. There is a small delay between
-        # when a create request is sent and when a subsequent call will see the results.
-        # This sleep works around that small delay. Is there a way to guarantee
-        # read-after-write consistency here?
-        time.sleep(1)
-        cluster = get_cluster(
-            cluster_name=cluster_name,
-            region=region,
-            vpc_id=vpc_id,
-        )
+        if cluster is not None:
+            # All the instances were created and EC2 has confirmed that they
+            # exist, so we already have everything we need to clean up.
+            cleanup_instances = cluster.instances
+        else:
+            # If the interruption happens right after a request to create instances is
+            # made, we may not find all cluster nodes here. There is a small delay between
+            # when a create request is sent and when a subsequent call will see the results.
+            # This sleep works around that small delay. Is there a way to guarantee
+            # read-after-write consistency here?
+            time.sleep(1)
+            try:
+                cleanup_instances = get_cluster(
+                    cluster_name=cluster_name,
+                    region=region,
+                    vpc_id=vpc_id,
+                ).instances
+            except ClusterNotFound:
+                cleanup_instances = []
         _cleanup_instances(
-            instances=cluster.instances,
+            instances=cleanup_instances,
             assume_yes=assume_yes,
             region=region,
         )
@@ -978,7 +1193,7 @@ def get_clusters(*, cluster_names: list=[], region: str, vpc_id: str) -> list:
     regardless of how many clusters we have to look up. That's because querying
     AWS -- a network operation -- is by far the slowest step.
     """
-    ec2 = boto3.resource(service_name='ec2', region_name=region)
+    ec2 = get_ec2_resource(region)
     if not vpc_id:
         vpc_id = get_default_vpc(region=region).id
 
@@ -999,11 +1214,14 @@ def get_clusters(*, cluster_names: list=[], region: str, vpc_id: str) -> list:
                 *cluster_name_filter,
             ]))
 
-    found_cluster_names = {
-        _get_cluster_name(instance) for instance in all_clusters_instances}
+    # Group the instances by cluster in one pass. Filtering the full list once
+    # per cluster would parse every instance's tags once per cluster.
+    instances_by_cluster_name = {}
+    for instance in all_clusters_instances:
+        instances_by_cluster_name.setdefault(_get_cluster_name(instance), []).append(instance)
 
     if cluster_names:
-        missing_cluster_names = set(cluster_names) - found_cluster_names
+        missing_cluster_names = set(cluster_names) - instances_by_cluster_name.keys()
         if missing_cluster_names:
             raise ClusterNotFound("No cluster {c} in region {r}.".format(
                 c=missing_cluster_names.pop(),
@@ -1014,9 +1232,8 @@ def get_clusters(*, cluster_names: list=[], region: str, vpc_id: str) -> list:
             name=cluster_name,
             region=region,
             vpc_id=vpc_id,
-            instances=list(filter(
-                lambda x: _get_cluster_name(x) == cluster_name, all_clusters_instances)))
-        for cluster_name in found_cluster_names]
+            instances=instances)
+        for cluster_name, instances in instances_by_cluster_name.items()]
 
     return clusters
 
@@ -1143,7 +1360,7 @@ def _compose_cluster(*, name: str, region: str, vpc_id: str, instances: list) ->
 
 
 def _cleanup_instances(*, instances: list, assume_yes: bool, region: str):
-    ec2 = boto3.resource(service_name='ec2', region_name=region)
+    ec2 = get_ec2_resource(region)
     if instances:
         if not assume_yes:
             yes = click.confirm(
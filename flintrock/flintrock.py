@@ -1,6 +1,6 @@
+import concurrent.futures
 import os
 import posixpath
-import errno
 import json
 import resource
 import sys
@@ -13,16 +13,12 @@ import logging
 
 # External modules
 import click
-import yaml
-# We import botocore here so we can catch when the user tries to
-# access AWS without having their credentials configured and provide
-# a friendly error message. Apart from that, flintrock.py should
-# not really know anything about EC2 or boto since that is delegated
-# to ec2.py.
-import botocore
 
 # Flintrock modules
-from . import ec2
+# NOTE: We import ec2, services, and yaml only in the commands that need
+#       them. Between them they pull in boto3 and paramiko, which take
+#       a few hundred milliseconds to import, and simple invocations like
+#       `flintrock --help` shouldn't have to pay for that.
 from .exceptions import (
     UsageError,
     UnsupportedProviderError,
@@ -30,7 +26,6 @@ from .exceptions import (
     Error)
 from flintrock import __version__
 from .util import spark_hadoop_build_version
-from .services import HDFS, Spark  # TODO: Remove this dependency.
 
 FROZEN = getattr(sys, 'frozen', False)
 
@@ -138,14 +133,15 @@ def mutually_exclusive(*, options: list, scope: dict):
     """
     mutually_exclusive_names = [option_name_to_variable_name(o) for o in options]
 
-    used_options = set()
-    for name, value in scope.items():
-        if name in mutually_exclusive_names and scope[name]:  # is not None:
-            used_options.add(name)
+    # We look up just the options we care about rather than scan the whole scope,
+    # which for a command like launch holds dozens of names.
+    used_options = [
+        name for name in mutually_exclusive_names
+        if scope.get(name)
+    ]
 
     if len(used_options) > 1:
-        bad_option1 = used_options.pop()
-        bad_option2 = used_options.pop()
+        bad_option1, bad_option2 = used_options[:2]
         raise UsageError(
             "Error: \"{option1}\" and \"{option2}\" are mutually exclusive.\n"
             "  {option1}: {value1}\n"
@@ -166,6 +162,18 @@ def get_config_file() -> str:
     return config_file
 
 
+def load_config_file(path: str) -> dict:
+    """
+    Load a Flintrock configuration file.
+    """
+    import yaml
+
+    # NOTE: LibYAML's loader is much faster than the pure-Python one, but
+    #       PyYAML isn't always built with it.
+    with open(path) as f:
+        return yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+
 def configure_log(debug: bool):
     root_logger = logging.getLogger('flintrock')
     handler = logging.StreamHandler(sys.stdout)
@@ -181,7 +189,7 @@ def configure_log(debug: bool):
 
 def build_hdfs_download_url(ctx, param, value):
     hdfs_version = ctx.params['hdfs_version']
-    if value.endswith('.gz') or value.endswith('.tgz'):
+    if value.endswith(('.gz', '.tgz')):
         logger.warning(
             "Hadoop download source appears to point to a file, not a directory. "
             "Flintrock will not try to determine the correct file to download based on "
@@ -205,7 +213,7 @@ def build_spark_download_url(ctx, param, value):
         if spark_version_tuple >= (3, 3, 0):
             hadoop_build_version = hadoop_build_version.split('.')[0]
 
-    if value.endswith('.gz') or value.endswith('.tgz'):
+    if value.endswith(('.gz', '.tgz')):
         logger.warning(
             "Spark download source appears to point to a file, not a directory. "
             "Flintrock will not try to determine the correct file to download based on "
@@ -220,7 +228,23 @@ def build_spark_download_url(ctx, param, value):
     )
 
 
+def cli_validate_ec2_tags(ctx, param, value):
+    from . import ec2
+    return ec2.cli_validate_tags(ctx, param, value)
+
+
+def cli_validate_ec2_authorize_access(ctx, param, value):
+    from . import ec2
+    return ec2.cli_validate_ec2_authorize_access(ctx, param, value)
+
+
 def validate_download_source(url):
+    parsed_url = urllib.parse.urlparse(url)
+
+    # Only the Apache mirror system needs checking.
+    if parsed_url.netloc != 'www.apache.org' or parsed_url.path != '/dyn/closer.lua':
+        return
+
     if 'spark' in url:
         software = 'Spark'
     elif 'hadoop' in url:
@@ -228,32 +252,33 @@ def validate_download_source(url):
     else:
         software = 'software'
 
-    parsed_url = urllib.parse.urlparse(url)
-
-    if parsed_url.netloc == 'www.apache.org' and parsed_url.path == '/dyn/closer.lua':
-        logger.warning(
-            "Warning: "
-            "Downloading {software} from an Apache mirror. Apache mirrors are "
-            "often slow and unreliable, and typically only serve the most recent releases. "
-            "We strongly recommend you specify a custom download source. "
-            "For more background on this issue, please see: https://github.com/nchammas/flintrock/issues/238"
+    logger.warning(
+        "Warning: "
+        "Downloading {software} from an Apache mirror. Apache mirrors are "
+        "often slow and unreliable, and typically only serve the most recent releases. "
+        "We strongly recommend you specify a custom download source. "
+        "For more background on this issue, please see: https://github.com/nchammas/flintrock/issues/238"
+        .format(
+            software=software,
+        )
+    )
+    # NOTE: We make a GET request rather than a HEAD request since urllib turns
+    #       redirected requests into GETs anyway, and the mirror system might
+    #       not answer HEAD requests. We close the response without reading
+    #       the body, so this doesn't download anything.
+    try:
+        urllib.request.urlopen(url, timeout=10).close()
+    except urllib.error.HTTPError as e:
+        raise Error(
+            "Error: Could not access {software} download. Maybe try a more recent release?\n"
+            "  - Automatically redirected to: {url}\n"
+            "  - HTTP error: {code}"
             .format(
                 software=software,
+                url=e.url,
+                code=e.code,
             )
         )
-        try:
-            urllib.request.urlopen(url)
-        except urllib.error.HTTPError as e:
-            raise Error(
-                "Error: Could not access {software} download. Maybe try a more recent release?\n"
-                "  - Automatically redirected to: {url}\n"
-                "  - HTTP error: {code}"
-                .format(
-                    software=software,
-                    url=e.url,
-                    code=e.code,
-                )
-            )
 
 
 @click.group()
@@ -274,16 +299,19 @@ def cli(cli_context, config, provider, debug):
     """
     cli_context.obj['provider'] = provider
 
-    if os.path.isfile(config):
-        with open(config) as f:
-            config_raw = yaml.safe_load(f)
-            debug = config_raw.get('debug') or debug
-            config_map = config_to_click(normalize_keys(config_raw))
+    # We just try to load the config file rather than check that it exists
+    # first, which would cost an extra stat of the same path.
+    try:
+        config_raw = load_config_file(config)
+    except FileNotFoundError:
+        # It's fine to not have a config file at the default location.
+        if config != get_config_file():
+            raise
+    else:
+        debug = config_raw.get('debug') or debug
+        config_map = config_to_click(normalize_keys(config_raw))
 
         cli_context.default_map = config_map
-    else:
-        if config != get_config_file():
-            raise FileNotFoundError(errno.ENOENT, 'No such file', config)
     configure_log(debug=debug)
 
 
@@ -365,12 +393,12 @@ def cli(cli_context, config, provider, debug):
               type=click.File(mode='r', encoding='utf-8'),
               help="Path to EC2 user data script that will run on instance launch.")
 @click.option('--ec2-tag', 'ec2_tags',
-              callback=ec2.cli_validate_tags,
+              callback=cli_validate_ec2_tags,
               multiple=True,
               help="Additional tags (e.g. 'Key,Value') to assign to the instances. "
                    "You can specify this option multiple times.")
 @click.option('--ec2-authorize-access-from',
-              callback=ec2.cli_validate_ec2_authorize_access,
+              callback=cli_validate_ec2_authorize_access,
               multiple=True,
               help=(
                   "Authorize cluster access from a specific source (e.g. on a private "
@@ -465,7 +493,17 @@ def launch(
         requires_all=['--ec2-subnet-id'],
         scope=locals())
 
-    check_external_dependency('ssh-keygen')
+    if install_spark and spark_git_commit == 'latest':
+        # We look up the latest commit in the background while we import the
+        # modules we need and check the download sources.
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        latest_commit_future = executor.submit(get_latest_commit, spark_git_repository)
+        executor.shutdown(wait=False)
+
+    # NOTE: core has to be imported before services because of the circular
+    #       import between the two. See the bottom of core.py.
+    from . import core  # noqa: F401
+    from .services import HDFS, Spark  # TODO: Remove this dependency.
 
     if install_hdfs:
         validate_download_source(hdfs_download_source)
@@ -488,7 +526,7 @@ def launch(
                 "Warning: Building Spark takes a long time. "
                 "e.g. 15-20 minutes on an m5.xlarge instance on EC2.")
             if spark_git_commit == 'latest':
-                spark_git_commit = get_latest_commit(spark_git_repository)
+                spark_git_commit = latest_commit_future.result()
                 logger.info("Building Spark at latest commit: {c}".format(c=spark_git_commit))
             spark = Spark(
                 spark_executor_instances=spark_executor_instances,
@@ -504,6 +542,7 @@ def launch(
             s='' if num_slaves == 1 else 's',
         ))
     if provider == 'ec2':
+        from . import ec2
         cluster = ec2.launch(
             cluster_name=cluster_name,
             num_slaves=num_slaves,
@@ -550,10 +589,11 @@ def get_latest_commit(github_repository: str):
             "for repositories hosted on GitHub. "
             "Provided repository domain was: {d}".format(d=repo_domain))
 
-    url = "https://api.github.com/repos/{rp}/commits".format(rp=repo_path)
+    # We only need the most recent commit, so we ask for just that one.
+    url = "https://api.github.com/repos/{rp}/commits?per_page=1".format(rp=repo_path)
     try:
-        with urllib.request.urlopen(url) as response:
-            result = json.loads(response.read().decode('utf-8'))
+        with urllib.request.urlopen(url, timeout=10) as response:
+            result = json.loads(response.read())
             return result[0]['sha']
     except Exception as e:
         raise Exception(
@@ -580,6 +620,7 @@ def destroy(cli_context, cluster_name, assume_yes, ec2_region, ec2_vpc_id):
         scope=locals())
 
     if provider == 'ec2':
+        from . import ec2
         cluster = ec2.get_cluster(
             cluster_name=cluster_name,
             region=ec2_region,
@@ -632,6 +673,7 @@ def describe(
         cluster_names = []
 
     if provider == 'ec2':
+        from . import ec2
         search_area = "in region {r}".format(r=ec2_region)
         clusters = ec2.get_clusters(
             cluster_names=cluster_names,
@@ -647,8 +689,9 @@ def describe(
         else:
             cluster.print()
     else:
+        clusters = sorted(clusters, key=lambda x: x.name)
         if master_hostname_only:
-            for cluster in sorted(clusters, key=lambda x: x.name):
+            for cluster in clusters:
                 logger.info("{}: {}".format(cluster.name, cluster.master_host))
         else:
             logger.info("Found {n} cluster{s}{space}{search_area}.".format(
@@ -658,7 +701,7 @@ def describe(
                 search_area=search_area))
             if clusters:
                 logger.info('---')
-                for cluster in sorted(clusters, key=lambda x: x.name):
+                for cluster in clusters:
                     cluster.print()
 
 
@@ -691,6 +734,7 @@ def login(cli_context, cluster_name, ec2_region, ec2_vpc_id, ec2_identity_file,
     check_external_dependency('ssh')
 
     if provider == 'ec2':
+        from . import ec2
         cluster = ec2.get_cluster(
             cluster_name=cluster_name,
             region=ec2_region,
@@ -731,6 +775,7 @@ def start(cli_context, cluster_name, ec2_region, ec2_vpc_id, ec2_identity_file,
         scope=locals())
 
     if provider == 'ec2':
+        from . import ec2
         cluster = ec2.get_cluster(
             cluster_name=cluster_name,
             region=ec2_region,
@@ -764,6 +809,7 @@ def stop(cli_context, cluster_name, ec2_region, ec2_vpc_id, assume_yes):
         scope=locals())
 
     if provider == 'ec2':
+        from . import ec2
         cluster = ec2.get_cluster(
             cluster_name=cluster_name,
             region=ec2_region,
@@ -799,7 +845,7 @@ def stop(cli_context, cluster_name, ec2_region, ec2_vpc_id, assume_yes):
 @click.option('--ec2-min-root-ebs-size-gb', type=int, default=30)
 @click.option('--assume-yes/--no-assume-yes', default=False)
 @click.option('--ec2-tag', 'ec2_tags',
-              callback=ec2.cli_validate_tags,
+              callback=cli_validate_ec2_tags,
               multiple=True,
               help="Additional tags (e.g. 'Key,Value') to assign to the instances. "
                    "You can specify this option multiple times.")
@@ -842,6 +888,7 @@ def add_slaves(
             s='' if num_slaves == 1 else 's',
         ))
     if provider == 'ec2':
+        from . import ec2
         cluster = ec2.get_cluster(
             cluster_name=cluster_name,
             region=ec2_region,
@@ -912,6 +959,7 @@ def remove_slaves(
         scope=locals())
 
     if provider == 'ec2':
+        from . import ec2
         cluster = ec2.get_cluster(
             cluster_name=cluster_name,
             region=ec2_region,
@@ -994,6 +1042,7 @@ def run_command(
         scope=locals())
 
     if provider == 'ec2':
+        from . import ec2
         cluster = ec2.get_cluster(
             cluster_name=cluster_name,
             region=ec2_region,
@@ -1068,6 +1117,7 @@ def copy_file(
         remote_path = posixpath.join(remote_path, os.path.basename(local_path))
 
     if provider == 'ec2':
+        from . import ec2
         cluster = ec2.get_cluster(
             cluster_name=cluster_name,
             region=ec2_region,
@@ -1080,26 +1130,26 @@ def copy_file(
     cluster.copy_file_check()
 
     if not assume_yes and not master_only:
+        # NOTE: We upload the file from here just once. The cluster master
+        #       forwards it to the other nodes.
         file_size_bytes = os.path.getsize(local_path)
         num_nodes = len(cluster.slave_ips) + 1  # TODO: cluster.num_nodes
-        total_size_bytes = file_size_bytes * num_nodes
 
-        if total_size_bytes > 10 ** 6:
+        if file_size_bytes > 10 ** 6:
             logger.warning("WARNING:")
             logger.warning(
                 format_message(
                     message="""\
-                        You are trying to upload {total_size} bytes ({size} bytes x {count}
-                        nodes in {cluster}). Depending on your upload bandwidth, this may take
-                        a long time.
+                        You are trying to upload {size} bytes to {cluster} and copy it
+                        to all {count} nodes. Depending on your upload bandwidth, this
+                        may take a long time.
                         You may be better off uploading this file to a storage service like
                         Amazon S3 and downloading it from there to the cluster using
                         `flintrock run-command ...`.
                         """.format(
                             size=file_size_bytes,
                             count=num_nodes,
-                            cluster=cluster_name,
-                            total_size=total_size_bytes),
+                            cluster=cluster_name),
                     wrap=60))
             click.confirm(
                 text="Are you sure you want to continue?",
@@ -1147,10 +1197,7 @@ def config_to_click(config: dict) -> dict:
         'ec2_' + k: v for (k, v) in config['providers']['ec2'].items()}
 
     click_map = {
-        'launch': dict(
-            list(config['launch'].items())
-            + list(ec2_configs.items())
-            + list(service_configs.items())),
+        'launch': {**config['launch'], **ec2_configs, **service_configs},
         'describe': ec2_configs,
         'destroy': ec2_configs,
         'login': ec2_configs,
@@ -1274,7 +1321,16 @@ def main() -> int:
             # get shared by all commands.
             # See: http://click.pocoo.org/6/api/#click.Context
             cli(obj={})
-        except botocore.exceptions.NoCredentialsError:
+        except Exception as e:
+            # We only want to catch botocore's NoCredentialsError. botocore is
+            # imported lazily with ec2.py, so if it hasn't been imported yet,
+            # the exception can't have come from it.
+            botocore_exceptions = sys.modules.get('botocore.exceptions')
+            if not (
+                botocore_exceptions
+                and isinstance(e, botocore_exceptions.NoCredentialsError)
+            ):
+                raise
             raise Error(
                 "Flintrock could not find your AWS credentials. "
                 "You can fix this by providing your credentials "
@@ -8,6 +8,7 @@ import subprocess
 import time
 
 MAX_TRIES = 5
+CURL_RANGE_ERROR = 33
 
 
 def parse_args():
@@ -18,6 +19,25 @@ def parse_args():
     return (args.url, args.destination_dir)
 
 
+def download_with_resume(url, download_path):
+    """
+    Download url to download_path. If a previous try was cut off partway,
+    pick up where it left off instead of downloading the whole package again.
+    """
+    try:
+        subprocess.check_call([
+            'curl', '--location', '--fail',
+            '--continue-at', '-',
+            '--output', download_path,
+            url,
+        ])
+    except subprocess.CalledProcessError as e:
+        if e.returncode == CURL_RANGE_ERROR and os.path.exists(download_path):
+            # The server doesn't support resuming downloads.
+            os.remove(download_path)
+        raise
+
+
 if __name__ == '__main__':
     url, destination_dir = parse_args()
 
@@ -37,9 +57,16 @@ if __name__ == '__main__':
             if url.startswith('s3://'):
                 subprocess.check_call(['aws', 's3', 'cp', url, download_path])
             else:
-                subprocess.check_call(['curl', '--location', '--output', download_path, url])
-            subprocess.check_call(['gzip', '--test', download_path])
-            subprocess.check_call(['tar', 'xzf', download_path, '-C', destination_dir, '--strip-components=1'])
+                download_with_resume(url, download_path)
+            try:
+                # tar checks the gzip stream as it goes, so there's no need
+                # to read the whole package once more with `gzip --test` first.
+                subprocess.check_call(['tar', 'xzf', download_path, '-C', destination_dir, '--strip-components=1'])
+            except subprocess.CalledProcessError:
+                # The download finished but is corrupt, so the next try
+                # has to start from scratch.
+                os.remove(download_path)
+                raise
             subprocess.check_call(['rm', download_path])
         except subprocess.CalledProcessError as e:
             print(e, file=sys.stderr)
@@ -1,8 +1,10 @@
 import json
 import os
+import posixpath
 import shlex
 import socket
 import sys
+import time
 import urllib.error
 import urllib.request
 import logging
@@ -26,11 +28,85 @@ if FROZEN:
 else:
     THIS_DIR = os.path.dirname(os.path.realpath(__file__))
 
-SCRIPTS_DIR = os.path.join(THIS_DIR, 'scripts')
-
 
 logger = logging.getLogger('flintrock.services')
 
+HEALTH_CHECK_TIMEOUT_SECONDS = 10
+
+
+def _get_json(url: str):
+    """
+    Fetch and decode a JSON document from a service's web UI.
+
+    Raise OSError if the UI is unreachable or doesn't answer within
+    HEALTH_CHECK_TIMEOUT_SECONDS, and ValueError if the response isn't JSON.
+    Without a timeout, a health check against a broken cluster can hang forever.
+    """
+    with urllib.request.urlopen(url, timeout=HEALTH_CHECK_TIMEOUT_SECONDS) as response:
+        return json.load(response)
+
+
+def _write_templates(
+        *,
+        ssh_client: paramiko.client.SSHClient,
+        template_paths: list,
+        mapping: dict):
+    """
+    Fill in the provided templates and write them out on a node, all in one
+    remote command rather than one command per file.
+
+    Template paths are relative both to the templates directory here and to
+    the user's home directory on the node.
+    """
+    directories = sorted({posixpath.dirname(path) for path in template_paths})
+    commands = ['set -e']
+    commands += [
+        'mkdir -p {d}'.format(d=shlex.quote(directory))
+        for directory in directories
+    ]
+    commands += [
+        'echo {f} > {p}'.format(
+            f=shlex.quote(
+                get_formatted_template(
+                    path=os.path.join(THIS_DIR, "templates", template_path),
+                    mapping=mapping)),
+            p=shlex.quote(template_path))
+        for template_path in template_paths
+    ]
+    ssh_check_output(
+        client=ssh_client,
+        command='\n'.join(commands))
+
+
+def _wait_for_http_ok(*, url: str, timeout_seconds: float):
+    """
+    Wait for the provided URL to answer a HEAD request with HTTP 200.
+
+    We probe the URL from here rather than run a polling loop on the remote
+    host, which would fork curl once a second. The delay between probes starts
+    small since the service is often up within a second or two.
+
+    Raise socket.timeout if the URL still isn't answering with HTTP 200 after
+    timeout_seconds.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    delay = 0.1
+    while True:
+        last_error = None
+        try:
+            request = urllib.request.Request(url, method='HEAD')
+            with urllib.request.urlopen(request, timeout=5) as response:
+                if response.status == 200:
+                    return
+        except OSError as e:
+            last_error = e
+        if time.monotonic() + delay > deadline:
+            raise socket.timeout(
+                "Timed out waiting for {u} to respond.".format(u=url)
+            ) from last_error
+        time.sleep(delay)
+        delay = min(delay * 2, 1)
+
 
 # TODO: Move this back to ec2.py. EC2-specific login should not live here.
 class SecurityGroupRule:
@@ -162,11 +238,7 @@ class HDFS(FlintrockService):
             .format(h=ssh_client.get_transport().getpeername()[0])
         )
 
-        with ssh_client.open_sftp() as sftp:
-            sftp.put(
-                localpath=os.path.join(SCRIPTS_DIR, 'download-package.py'),
-                remotepath='/tmp/download-package.py')
-
+        # NOTE: setup_node() has already uploaded download-package.py.
         logger.debug(
             "[{h}] Downloading Hadoop from: {s}"
             .format(
@@ -205,29 +277,20 @@ class HDFS(FlintrockService):
             'hadoop/conf/hdfs-site.xml',
         ]
 
-        ssh_check_output(
-            client=ssh_client,
-            command="mkdir -p hadoop/conf",
+        mapping = generate_template_mapping(
+            cluster=cluster,
+            hadoop_version=self.version,
+            # Hadoop doesn't need to know what
+            # Spark version we're using.
+            spark_version='',
+            spark_executor_instances=0,
         )
 
-        for template_path in template_paths:
-            ssh_check_output(
-                client=ssh_client,
-                command="""
-                    echo {f} > {p}
-                """.format(
-                    f=shlex.quote(
-                        get_formatted_template(
-                            path=os.path.join(THIS_DIR, "templates", template_path),
-                            mapping=generate_template_mapping(
-                                cluster=cluster,
-                                hadoop_version=self.version,
-                                # Hadoop doesn't need to know what
-                                # Spark version we're using.
-                                spark_version='',
-                                spark_executor_instances=0,
-                            ))),
-                    p=shlex.quote(template_path)))
+        _write_templates(
+            ssh_client=ssh_client,
+            template_paths=template_paths,
+            mapping=mapping,
+        )
 
     # TODO: Convert this into start_master() and split master- or slave-specific
     #       stuff out of configure() into configure_master() and configure_slave().
@@ -249,26 +312,17 @@ class HDFS(FlintrockService):
         attempt_limit = 3
         for attempt in range(attempt_limit):
             try:
+                deadline = time.monotonic() + 90
                 ssh_check_output(
                     client=ssh_client,
                     command="""
                         ./hadoop/sbin/stop-dfs.sh
                         ./hadoop/sbin/start-dfs.sh
-
-                        master_ui_response_code=0
-                        while [ "$master_ui_response_code" -ne 200 ]; do
-                            sleep 1
-                            master_ui_response_code="$(
-                                curl \
-                                    --location --head --silent \
-                                    --output /dev/null \
-                                    --write-out "%{{http_code}}" \
-                                    {m}:{p}
-                            )"
-                        done
-                    """.format(m=shlex.quote(cluster.master_private_host), p=self.name_node_ui_port),
-                    timeout_seconds=90
-                )
+                    """,
+                    timeout_seconds=90)
+                _wait_for_http_ok(
+                    url='http://{h}:{p}'.format(h=host, p=self.name_node_ui_port),
+                    timeout_seconds=deadline - time.monotonic())
                 break
             except socket.timeout as e:
                 logger.debug(
@@ -284,13 +338,9 @@ class HDFS(FlintrockService):
         hdfs_master_ui = 'http://{m}:{p}/webhdfs/v1/?op=GETCONTENTSUMMARY'.format(m=master_host, p=self.name_node_ui_port)
 
         try:
-            json.loads(
-                urllib.request
-                .urlopen(hdfs_master_ui)
-                .read()
-                .decode('utf-8'))
+            _get_json(hdfs_master_ui)
             logger.info("HDFS online.")
-        except Exception as e:
+        except (OSError, ValueError) as e:
             raise Exception("HDFS health check failed.") from e
 
     def get_security_group_rules(self, flintrock_client_cidr: str=None, flintrock_client_group: str=None):
@@ -348,11 +398,7 @@ class Spark(FlintrockService):
         )
 
         if self.version:
-            with ssh_client.open_sftp() as sftp:
-                sftp.put(
-                    localpath=os.path.join(SCRIPTS_DIR, 'download-package.py'),
-                    remotepath='/tmp/download-package.py')
-
+            # NOTE: setup_node() has already uploaded download-package.py.
             logger.debug(
                 "[{h}] Downloading Spark from: {s}"
                 .format(
@@ -374,8 +420,7 @@ class Spark(FlintrockService):
                 client=ssh_client,
                 command="""
                     set -e
-                    sudo yum install -y git
-                    sudo yum install -y java-devel
+                    sudo yum install -y git java-devel
                     """)
 
             logger.debug(
@@ -424,27 +469,18 @@ class Spark(FlintrockService):
             'spark/conf/slaves',
         ]
 
-        ssh_check_output(
-            client=ssh_client,
-            command="mkdir -p spark/conf",
+        mapping = generate_template_mapping(
+            cluster=cluster,
+            spark_executor_instances=self.spark_executor_instances,
+            hadoop_version=self.hadoop_version,
+            spark_version=self.version or self.git_commit,
         )
 
-        for template_path in template_paths:
-            ssh_check_output(
-                client=ssh_client,
-                command="""
-                    echo {f} > {p}
-                """.format(
-                    f=shlex.quote(
-                        get_formatted_template(
-                            path=os.path.join(THIS_DIR, "templates", template_path),
-                            mapping=generate_template_mapping(
-                                cluster=cluster,
-                                spark_executor_instances=self.spark_executor_instances,
-                                hadoop_version=self.hadoop_version,
-                                spark_version=self.version or self.git_commit,
-                            ))),
-                    p=shlex.quote(template_path)))
+        _write_templates(
+            ssh_client=ssh_client,
+            template_paths=template_paths,
+            mapping=mapping,
+        )
 
     # TODO: Convert this into start_master() and split master- or slave-specific
     #       stuff out of configure() into configure_master() and configure_slave().
@@ -461,24 +497,16 @@ class Spark(FlintrockService):
         attempt_limit = 3
         for attempt in range(attempt_limit):
             try:
+                deadline = time.monotonic() + 90
                 ssh_check_output(
                     client=ssh_client,
-                    # Maybe move this shell script out to some separate
-                    # file/folder for the Spark service.
                     command="""
                         spark/sbin/start-all.sh
-
-                        master_ui_response_code=0
-                        while [ "$master_ui_response_code" -ne 200 ]; do
-                            sleep 1
-                            master_ui_response_code="$(
-                                curl --head --silent --output /dev/null \
-                                    --write-out "%{{http_code}}" {m}:8080
-                            )"
-                        done
-                    """.format(m=shlex.quote(cluster.master_private_host)),
-                    timeout_seconds=90
-                )
+                    """,
+                    timeout_seconds=90)
+                _wait_for_http_ok(
+                    url='http://{h}:8080'.format(h=host),
+                    timeout_seconds=deadline - time.monotonic())
                 break
             except socket.timeout as e:
                 logger.debug(
@@ -492,17 +520,11 @@ class Spark(FlintrockService):
         spark_master_ui = 'http://{m}:8080/json/'.format(m=master_host)
 
         try:
-            json.loads(
-                urllib.request
-                .urlopen(spark_master_ui)
-                .read()
-                .decode('utf-8')
-            )
+            _get_json(spark_master_ui)
             # TODO: Don't print here. Return this and let the caller print.
             logger.info("Spark online.")
-        except Exception as e:
-            # TODO: Catch a more specific problem known to be related to Spark not
-            #       being up; provide a slightly better error message, and don't
+        except (OSError, ValueError) as e:
+            # TODO: Provide a slightly better error message, and don't
             #       dump a large stack trace on the user.
             raise Exception("Spark health check failed.") from e
 
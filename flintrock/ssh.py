@@ -1,8 +1,11 @@
 import errno
+import functools
+import io
 import os
+import random
+import select
 import socket
 import subprocess
-import tempfile
 import time
 import logging
 from collections import namedtuple
@@ -19,32 +22,44 @@ SSHKeyPair = namedtuple('KeyPair', ['public', 'private'])
 
 logger = logging.getLogger('flintrock.ssh')
 
+SSH_RECV_BYTES = 32 * 1024
+
 
 def generate_ssh_key_pair() -> SSHKeyPair:
     """
     Generate an SSH key pair that the cluster can use for intra-cluster
     communication.
     """
-    with tempfile.TemporaryDirectory() as tempdir:
-        subprocess.check_call(
-            [
-                'ssh-keygen',
-                '-q',
-                '-t', 'rsa',
-                '-N', '',
-                '-f', os.path.join(tempdir, 'flintrock_rsa'),
-                '-C', 'flintrock',
-            ],
-            env=get_subprocess_env(),
-        )
+    # We generate the key in-process rather than shell out to ssh-keygen, which
+    # saves a fork and a temporary directory, and means the local machine
+    # doesn't need ssh-keygen installed.
+    key = paramiko.RSAKey.generate(bits=2048)
+
+    private_key_file = io.StringIO()
+    key.write_private_key(private_key_file)
+    private_key = private_key_file.getvalue()
+
+    public_key = '{name} {key} flintrock\n'.format(
+        name=key.get_name(),
+        key=key.get_base64())
 
-        with open(file=os.path.join(tempdir, 'flintrock_rsa')) as private_key_file:
-            private_key = private_key_file.read()
+    return SSHKeyPair(public=public_key, private=private_key)
 
-        with open(file=os.path.join(tempdir, 'flintrock_rsa.pub')) as public_key_file:
-            public_key = public_key_file.read()
 
-    return namedtuple('KeyPair', ['public', 'private'])(public_key, private_key)
+@functools.lru_cache()
+def _get_system_host_keys() -> paramiko.hostkeys.HostKeys:
+    """
+    Load the user's known hosts.
+
+    A long known_hosts file takes a while to parse, and we would otherwise parse
+    it again for every node we connect to.
+    """
+    host_keys = paramiko.hostkeys.HostKeys()
+    try:
+        host_keys.load(os.path.expanduser('~/.ssh/known_hosts'))
+    except IOError:
+        pass
+    return host_keys
 
 
 def get_ssh_client(
@@ -63,7 +78,14 @@ def get_ssh_client(
 
     client = paramiko.client.SSHClient()
 
-    client.load_system_host_keys()
+    # NOTE: This stands in for client.load_system_host_keys(), except that we
+    #       parse the file once and share the result across clients. Each
+    #       client only connects to one host, so we just give it the known keys
+    #       for that host. paramiko checks them the same way when connecting.
+    known_host_keys = _get_system_host_keys().lookup(host)
+    if known_host_keys:
+        for (key_type, key) in known_host_keys.items():
+            client.get_host_keys().add(host, key_type, key)
     client.set_missing_host_key_policy(paramiko.client.AutoAddPolicy())
 
     if wait:
@@ -73,6 +95,7 @@ def get_ssh_client(
         # https://github.com/nchammas/flintrock/issues/198
         tries = 3
 
+    attempt = 0
     while tries > 0:
         try:
             tries -= 1
@@ -87,23 +110,25 @@ def get_ssh_client(
             break
         except socket.timeout as e:
             logger.debug("[{h}] SSH timeout.".format(h=host))
-            time.sleep(5)
         except paramiko.ssh_exception.NoValidConnectionsError as e:
             if any(error.errno != errno.ECONNREFUSED for error in e.errors.values()):
                 raise
             logger.debug("[{h}] SSH exception: {e}".format(h=host, e=e))
-            time.sleep(5)
         # We get this exception during startup with CentOS but not Amazon Linux,
         # for some reason.
         except paramiko.ssh_exception.AuthenticationException as e:
             logger.debug("[{h}] SSH AuthenticationException.".format(h=host))
-            time.sleep(5)
         except paramiko.ssh_exception.SSHException as e:
             raise SSHError(
                 host=host,
                 message="SSH protocol error. Possible causes include using "
                 "the wrong key file or username.",
             ) from e
+        # We back off exponentially, with jitter so that the many nodes of a
+        # freshly launched cluster don't all retry in lockstep.
+        if tries > 0:
+            time.sleep(min(2 ** (attempt + 1), 10) * random.uniform(0.5, 1.5))
+            attempt += 1
     else:
         raise SSHError(
             host=host,
@@ -112,28 +137,77 @@ def get_ssh_client(
     return client
 
 
+def get_sftp_client(client: paramiko.client.SSHClient) -> paramiko.sftp_client.SFTPClient:
+    """
+    Get an SFTP client that runs over the provided SSH client.
+
+    Starting the SFTP subsystem costs an extra round trip, so we start it once
+    per SSH client and reuse it. Don't close the returned SFTP client; it gets
+    closed along with the SSH client.
+    """
+    sftp = getattr(client, '_flintrock_sftp', None)
+    if sftp is None or sftp.get_channel().closed:
+        sftp = client.open_sftp()
+        client._flintrock_sftp = sftp
+    return sftp
+
+
 def ssh_check_output(
         client: paramiko.client.SSHClient,
         command: str,
         timeout_seconds: int=None,
+        get_pty: bool=False,
 ):
     """
     Run a command via the provided SSH client and return the output captured
     on stdout.
 
     Raise an exception if the command returns a non-zero code.
+
+    Set get_pty to run the command in a pseudo-terminal, as an interactive
+    session would. stderr is then merged into stdout.
     """
-    stdin, stdout, stderr = client.exec_command(
-        command,
-        get_pty=True,
-        timeout=timeout_seconds)
-
-    # NOTE: Paramiko doesn't clearly document this, but we must read() before
-    #       calling recv_exit_status().
-    #       See: https://github.com/paramiko/paramiko/issues/448#issuecomment-159481997
-    stdout_output = stdout.read().decode('utf8').rstrip('\n')
-    stderr_output = stderr.read().decode('utf8').rstrip('\n')
-    exit_status = stdout.channel.recv_exit_status()
+    # NOTE: By default we don't request a pty. Without one, stderr stays
+    #       separate from stdout, so warnings don't end up mixed into output
+    #       we parse, and the remote side doesn't have to set up a terminal for
+    #       each command. But sshd then keeps the channel open until every
+    #       process holding stdout or stderr closes them, including anything
+    #       the command started in the background, and closing the channel
+    #       doesn't send SIGHUP to the command.
+    channel = client.get_transport().open_session(timeout=timeout_seconds)
+    if get_pty:
+        channel.get_pty()
+    channel.exec_command(command)
+
+    # We drain stdout and stderr together as data arrives. Reading one to the
+    # end before the other can deadlock once the unread stream fills its
+    # channel window.
+    if timeout_seconds is not None:
+        deadline = time.monotonic() + timeout_seconds
+    stdout_chunks = []
+    stderr_chunks = []
+    with channel:
+        while True:
+            if channel.recv_ready():
+                stdout_chunks.append(channel.recv(SSH_RECV_BYTES))
+            elif channel.recv_stderr_ready():
+                stderr_chunks.append(channel.recv_stderr(SSH_RECV_BYTES))
+            elif channel.eof_received or channel.closed:
+                break
+            else:
+                if timeout_seconds is None:
+                    wait_seconds = None
+                else:
+                    wait_seconds = deadline - time.monotonic()
+                    if wait_seconds <= 0:
+                        raise socket.timeout(
+                            "Timed out waiting for command to finish: {c}"
+                            .format(c=command))
+                select.select([channel], [], [], wait_seconds)
+        exit_status = channel.recv_exit_status()
+
+    stdout_output = b''.join(stdout_chunks).decode('utf8').rstrip('\n')
+    stderr_output = b''.join(stderr_chunks).decode('utf8').rstrip('\n')
 
     if exit_status:
         # TODO: Return a custom exception that includes the return code.
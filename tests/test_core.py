@@ -1,11 +1,20 @@
+import functools
 import os
+import subprocess
+import threading
+import time
+
 import pytest
 
 # Flintrock
 from flintrock.core import (
+    check_services_health,
     generate_template_mapping,
     get_formatted_template,
+    run_against_hosts,
+    _forward_file_command,
 )
+from flintrock.exceptions import Error
 
 FLINTROCK_ROOT_DIR = (
     os.path.dirname(
@@ -35,3 +44,112 @@ def test_templates(dummy_cluster, spark_version):
                     path=template_path,
                     mapping=mapping,
                 )
+
+
+def test_get_formatted_template_reads_each_file_once(tmpdir):
+    template = tmpdir.join('template')
+    template.write('{name}\n')
+    assert get_formatted_template(path=str(template), mapping={'name': 'spark'}) == 'spark\n'
+
+    template.remove()
+    assert get_formatted_template(path=str(template), mapping={'name': 'hdfs'}) == 'hdfs\n'
+
+
+def test_check_services_health_retries(monkeypatch):
+    monkeypatch.setattr('flintrock.core.time.sleep', lambda seconds: None)
+
+    class FlakyService:
+        def __init__(self, failures):
+            self.failures = failures
+
+        def health_check(self, master_host):
+            if self.failures:
+                self.failures -= 1
+                raise Exception("Not up yet.")
+
+    service = FlakyService(failures=2)
+    check_services_health(services=[service], master_host='master')
+    assert service.failures == 0
+
+    with pytest.raises(Exception):
+        check_services_health(
+            services=[FlakyService(failures=1)],
+            master_host='master',
+            timeout_seconds=0)
+
+
+def test_run_against_hosts_logs_first_failure_and_waits(caplog):
+    slow_host_done = threading.Event()
+    finished_hosts = []
+
+    def work(host):
+        if host == 'bad':
+            raise Exception("Failed on {h}.".format(h=host))
+        elif host == 'slow':
+            slow_host_done.wait(timeout=10)
+            finished_hosts.append(host)
+
+    def release_slow_host():
+        # The failure should be logged while the slow host is still busy.
+        while "[bad] Failed on bad." not in caplog.text:
+            time.sleep(0.01)
+        slow_host_done.set()
+
+    releaser = threading.Thread(target=release_slow_host)
+    releaser.start()
+
+    start = time.monotonic()
+    with pytest.raises(Exception, match="Failed on bad."):
+        run_against_hosts(
+            partial_func=functools.partial(work),
+            hosts=['slow', 'bad'])
+    releaser.join()
+
+    assert time.monotonic() - start < 5
+    # The error is raised only after the other hosts finish.
+    assert finished_hosts == ['slow']
+
+
+def test_run_against_hosts_reports_every_failure(caplog):
+    finished_hosts = []
+
+    def work(host):
+        if host.startswith('bad'):
+            raise Exception("Failed on {h}.".format(h=host))
+        time.sleep(0.1)
+        finished_hosts.append(host)
+
+    with pytest.raises(Error, match="Failed on 2 of 3 hosts."):
+        run_against_hosts(
+            partial_func=functools.partial(work),
+            hosts=['bad1', 'good', 'bad2'],
+            summarize_failures=True)
+    assert finished_hosts == ['good']
+    assert "[bad1] Failed on bad1." in caplog.text
+    assert "[bad2] Failed on bad2." in caplog.text
+
+
+def test_forward_file_command_reports_scp_failures(tmpdir):
+    # A stub scp that fails right away for one host while another host is
+    # still copying.
+    scp = tmpdir.join('scp')
+    scp.write(
+        '#!/bin/bash\n'
+        'case "${@: -1}" in\n'
+        '    bad:*) echo "No such file or directory" >&2; exit 1;;\n'
+        '    slow:*) sleep 1;;\n'
+        'esac\n')
+    scp.chmod(0o755)
+
+    result = subprocess.run(
+        [
+            'bash', '-c',
+            _forward_file_command(remote_path='/tmp/file', hosts=['slow', 'bad']),
+        ],
+        env={**os.environ, 'PATH': str(tmpdir) + os.pathsep + os.environ['PATH']},
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    assert result.returncode == 1
+    assert "[bad] No such file or directory" in result.stdout
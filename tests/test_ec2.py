@@ -1,6 +1,16 @@
+import types
+
+import boto3
+import botocore.stub
 import pytest
 import click
-from flintrock.ec2 import validate_tags
+import flintrock.ec2
+from flintrock.ec2 import (
+    validate_tags,
+    _get_missing_ip_permissions,
+    _set_security_groups,
+    _get_instance_state_waiter,
+)
 
 
 def test_validate_tags():
@@ -30,3 +40,65 @@ def test_validate_tags():
     for test_case in negative_test_cases:
         with pytest.raises(click.BadParameter):
             validate_tags(test_case)
+
+
+def test_get_missing_ip_permissions():
+    existing = [
+        # EC2 leaves out the ports on rules that cover all protocols.
+        {'IpProtocol': '-1', 'UserIdGroupPairs': [{'GroupId': 'sg-1', 'UserId': '123'}]},
+        {'IpProtocol': 'tcp', 'FromPort': 22, 'ToPort': 22, 'IpRanges': [{'CidrIp': '1.2.3.4/32'}]},
+    ]
+    ssh_rule = {'IpProtocol': 'tcp', 'FromPort': 22, 'ToPort': 22, 'IpRanges': [{'CidrIp': '1.2.3.4/32'}]}
+    self_rule = {'IpProtocol': '-1', 'FromPort': -1, 'ToPort': -1, 'UserIdGroupPairs': [{'GroupId': 'sg-1'}]}
+    spark_rule = {'IpProtocol': 'tcp', 'FromPort': 8080, 'ToPort': 8081, 'IpRanges': [{'CidrIp': '1.2.3.4/32'}]}
+
+    assert _get_missing_ip_permissions(
+        existing=existing,
+        wanted=[ssh_rule, self_rule, spark_rule, spark_rule],
+    ) == [spark_rule]
+    assert _get_missing_ip_permissions(existing=[], wanted=[ssh_rule]) == [ssh_rule]
+
+
+def test_set_security_groups(monkeypatch):
+    calls = []
+
+    class FakeClient:
+        def modify_instance_attribute(self, **kwargs):
+            calls.append(kwargs)
+
+    fake_ec2 = types.SimpleNamespace(meta=types.SimpleNamespace(client=FakeClient()))
+    monkeypatch.setattr(flintrock.ec2, 'get_ec2_resource', lambda region: fake_ec2)
+
+    instances = [types.SimpleNamespace(id='i-{n}'.format(n=n)) for n in range(25)]
+    _set_security_groups(instances=instances, group_ids=['sg-1'], region='us-east-1')
+
+    assert sorted(calls, key=lambda c: int(c['InstanceId'][2:])) == [
+        {'InstanceId': instance.id, 'Groups': ['sg-1']}
+        for instance in instances
+    ]
+
+
+def test_instance_state_waiter_waits_out_pending_instances():
+    client = boto3.client(
+        'ec2',
+        region_name='us-east-1',
+        aws_access_key_id='test',
+        aws_secret_access_key='test')
+
+    def describe_instances_response(*states):
+        return {
+            'Reservations': [{
+                'Instances': [{'State': {'Name': state}} for state in states],
+            }],
+        }
+
+    with botocore.stub.Stubber(client) as stubber:
+        # The stock instance_terminated waiter fails as soon as it sees an
+        # instance that is still pending.
+        stubber.add_response('describe_instances', describe_instances_response('pending', 'shutting-down'))
+        stubber.add_response('describe_instances', describe_instances_response('terminated', 'terminated'))
+
+        _get_instance_state_waiter(client=client, state='terminated').wait(
+            WaiterConfig={'Delay': 0, 'MaxAttempts': 5})
+
+        stubber.assert_no_pending_responses()
@@ -1,6 +1,8 @@
 import os
+from types import SimpleNamespace
 
 # External modules
+import click.testing
 import pytest
 
 # Flintrock modules
@@ -16,6 +18,8 @@ from flintrock.flintrock import (
     get_latest_commit,
     validate_download_source,
     normalize_keys,
+    load_config_file,
+    cli,
 )
 
 
@@ -185,3 +189,41 @@ def test_normalize_keys():
         "tags": ["name, test-cluster"],
     }
     assert normalize_keys(config_file_settings) == cli_settings
+
+
+def test_load_config_file(tmpdir):
+    config_file = tmpdir.join('config.yaml')
+    config_file.write('launch:\n  num-slaves: 1\n')
+
+    assert load_config_file(str(config_file)) == {'launch': {'num-slaves': 1}}
+
+
+def test_describe(tmpdir, monkeypatch):
+    import flintrock.ec2
+
+    requests = []
+
+    def get_clusters(*, cluster_names, region, vpc_id):
+        requests.append((cluster_names, region, vpc_id))
+        return [SimpleNamespace(name='test-cluster', master_host='master.example.com')]
+
+    monkeypatch.setattr(flintrock.ec2, 'get_clusters', get_clusters)
+
+    config_file = tmpdir.join('config.yaml')
+    config_file.write(
+        'providers:\n'
+        '  ec2:\n'
+        '    region: us-east-1\n'
+        'launch: {}\n')
+
+    result = click.testing.CliRunner().invoke(
+        cli,
+        [
+            '--config', str(config_file),
+            'describe', '--master-hostname-only',
+        ],
+        obj={},
+    )
+
+    assert result.exit_code == 0, result.output
+    assert requests == [([], 'us-east-1', '')]
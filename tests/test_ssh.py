@@ -0,0 +1,17 @@
+import io
+
+import paramiko
+
+from flintrock.ssh import generate_ssh_key_pair
+
+
+def test_generate_ssh_key_pair():
+    key_pair = generate_ssh_key_pair()
+
+    private_key = paramiko.RSAKey.from_private_key(io.StringIO(key_pair.private))
+    key_type, key_base64, comment = key_pair.public.split()
+
+    assert key_type == 'ssh-rsa'
+    assert key_base64 == private_key.get_base64()
+    assert comment == 'flintrock'
+    assert private_key.get_bits() == 2048